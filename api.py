@@ -1,14 +1,23 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from scraper import scrape_site, auto_detect_common_fields, fetch_html
+from crawler import crawl_site
+from store import MAX_PAGE_SIZE, ResultStore
+from schedules import Scheduler, next_run_time, run_schedule
+import csv
+import io
+import json
+import os
 import threading
+import time
 import uuid
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# In-memory storage for jobs (in a real app, use a database)
-jobs = {}
+# Durable job and result storage (SQLite in WAL mode)
+store = ResultStore(os.environ.get("SCRAPER_DB", "scraper_jobs.db"))
+store.mark_interrupted()
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -31,13 +40,48 @@ def detect_fields():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/scrape', methods=['POST'])
-def start_scrape():
-    data = request.json
-    job_id = str(uuid.uuid4())
-    
-    # Extract parameters
-    config = {
+def run_job(job_id, work):
+    """Run work(progress_callback) in a background thread, recording the outcome in the store."""
+    def progress_callback(page, total):
+        store.update_progress(job_id, page, total)
+
+    def worker():
+        try:
+            work(progress_callback)
+            store.finish_job(job_id, "completed")
+        except Exception as e:
+            store.finish_job(job_id, "failed", str(e))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+
+def stream_to_store(job_id, target, cfg):
+    """Build a job body that streams every scraped page into the store."""
+    def work(progress_callback):
+        writer = store.writer(job_id)
+        try:
+            target(progress_callback=progress_callback,
+                   page_callback=lambda page_url, items: writer.add(items),
+                   collect_results=False, **cfg)
+        finally:
+            writer.flush()
+    return work
+
+def proxy_spec(data):
+    """JSON-friendly proxy pool spec (see proxies.make_proxy_pool), or None."""
+    if not (data.get('proxies') or data.get('tor_ports')):
+        return None
+    spec = {
+        'proxies': data.get('proxies'),
+        'tor_ports': data.get('tor_ports'),
+        'strategy': data.get('proxy_strategy', 'per_request'),
+    }
+    if 'isolate_streams' in data:
+        spec['isolate_streams'] = data['isolate_streams']
+    return spec
+
+def scrape_config(data):
+    return {
         'base_url': data.get('url'),
         'fields': data.get('fields'),
         'next_selector': data.get('next_selector'),
@@ -52,69 +96,234 @@ def start_scrape():
         'normalize_urls': data.get('normalize_urls', True),
         'request_timeout': int(data.get('timeout', 20)),
         'request_retries': int(data.get('retries', 2)),
+        'proxy_pool': proxy_spec(data),
     }
 
-    # Initialize job status
-    jobs[job_id] = {
-        "status": "running",
-        "progress": {"page": 0, "total": 0 if config['scrape_all'] else config['max_pages']},
-        "results": [],
-        "error": None
+def crawl_config(data):
+    return {
+        'start_urls': data.get('start_urls') or ([data['url']] if data.get('url') else []),
+        'routes': data.get('routes'),
+        'fields': data.get('fields'),
+        'auto_mode': data.get('auto_mode', False),
+        'allow': data.get('allow'),
+        'deny': data.get('deny'),
+        'max_depth': int(data.get('max_depth', 2)),
+        'max_pages': int(data.get('max_pages', 100)),
+        'same_domain': data.get('same_domain', True),
+        'strip_params': data.get('strip_params'),
+        'concurrency': int(data.get('concurrency', 1)),
+        'use_selenium': data.get('use_selenium', False),
+        'use_tor': data.get('use_tor', False),
+        'delay_range': tuple(data.get('delay_range', [1.0, 2.0])),
+        'normalize_urls': data.get('normalize_urls', True),
+        'request_timeout': int(data.get('timeout', 20)),
+        'request_retries': int(data.get('retries', 2)),
+        'proxy_pool': proxy_spec(data),
     }
 
-    def run_scraper(jid, cfg):
-        try:
-            def progress_callback(page, total):
-                if jid in jobs:
-                    jobs[jid]["progress"] = {"page": page, "total": total}
-
-            results = scrape_site(
-                base_url=cfg['base_url'],
-                fields=cfg['fields'],
-                next_selector=cfg['next_selector'],
-                use_selenium=cfg['use_selenium'],
-                scrape_all=cfg['scrape_all'],
-                max_pages=cfg['max_pages'],
-                auto_mode=cfg['auto_mode'],
-                infinite_scroll=cfg['infinite_scroll'],
-                load_more_selector=cfg['load_more_selector'],
-                use_tor=cfg['use_tor'],
-                delay_range=cfg['delay_range'],
-                progress_callback=progress_callback,
-                normalize_urls=cfg['normalize_urls'],
-                request_timeout=cfg['request_timeout'],
-                request_retries=cfg['request_retries']
-            )
-            jobs[jid]["results"] = results
-            jobs[jid]["status"] = "completed"
-        except Exception as e:
-            jobs[jid]["error"] = str(e)
-            jobs[jid]["status"] = "failed"
+def job_total(kind, config):
+    if kind == "scrape" and config['scrape_all']:
+        return 0
+    return config['max_pages']
 
-    # Run in background thread
-    thread = threading.Thread(target=run_scraper, args=(job_id, config))
-    thread.start()
+@app.route('/scrape', methods=['POST'])
+def start_scrape():
+    data = request.json
+    job_id = str(uuid.uuid4())
+    config = scrape_config(data)
+
+    store.create_job(job_id, "scrape", config, total=job_total("scrape", config))
+    run_job(job_id, stream_to_store(job_id, scrape_site, config))
+
+    return jsonify({"job_id": job_id})
+
+@app.route('/crawl', methods=['POST'])
+def start_crawl():
+    data = request.json
+    config = crawl_config(data)
+    if not config['start_urls']:
+        return jsonify({"error": "url or start_urls is required"}), 400
+    if config['concurrency'] < 1:
+        return jsonify({"error": "concurrency must be at least 1"}), 400
+    job_id = str(uuid.uuid4())
+
+    store.create_job(job_id, "crawl", config, total=job_total("crawl", config))
+    run_job(job_id, stream_to_store(job_id, crawl_site, config))
 
     return jsonify({"job_id": job_id})
 
+def launch_schedule(schedule):
+    """Start one run of a recurring job unless its previous run is still going."""
+    last = store.get_job(schedule["last_job_id"]) if schedule["last_job_id"] else None
+    if last and last["status"] == "running":
+        return last["id"]
+    job_id = str(uuid.uuid4())
+    store.create_job(job_id, "scheduled-" + schedule["kind"],
+                     dict(schedule["config"], schedule_id=schedule["id"]),
+                     total=job_total(schedule["kind"], schedule["config"]))
+    store.update_schedule(schedule["id"], last_job_id=job_id)
+    run_job(job_id, lambda progress_callback: run_schedule(store, schedule, job_id, progress_callback))
+    return job_id
+
+scheduler = Scheduler(store, launch_schedule)
+
+def positive_int(value):
+    """Return value as a positive int (digit strings allowed), or None if it is not one."""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        return None
+    return value
+
+@app.route('/schedules', methods=['POST'])
+def create_schedule():
+    data = request.json
+    kind = data.get('kind', 'scrape')
+    if kind not in ("scrape", "crawl"):
+        return jsonify({"error": "kind must be 'scrape' or 'crawl'"}), 400
+    interval = data.get('interval_seconds')
+    cron = data.get('cron')
+    if (interval is None) == (not cron):
+        return jsonify({"error": "Provide exactly one of interval_seconds or cron"}), 400
+    if interval is not None:
+        interval = positive_int(interval)
+        if interval is None:
+            return jsonify({"error": "interval_seconds must be a positive integer"}), 400
+    key_fields = data.get('key_fields')
+    if key_fields is not None and not (
+            isinstance(key_fields, list) and all(isinstance(f, str) for f in key_fields)):
+        return jsonify({"error": "key_fields must be a list of field names"}), 400
+    stop_after = data.get('stop_after_unchanged_pages')
+    if stop_after is not None:
+        stop_after = positive_int(stop_after)
+        if stop_after is None:
+            return jsonify({"error": "stop_after_unchanged_pages must be a positive integer"}), 400
+    schedule = {"cron": cron, "interval_seconds": interval}
+    try:
+        if cron is not None and not isinstance(cron, str):
+            raise ValueError("cron must be a string")
+        # Also rejects expressions that parse but never fire, e.g. "0 0 31 2 *"
+        next_run = next_run_time(schedule)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    config = scrape_config(data) if kind == "scrape" else crawl_config(data)
+    if not (config.get('base_url') or config.get('start_urls')):
+        return jsonify({"error": "URL is required"}), 400
+    if config.get('concurrency', 1) < 1:
+        return jsonify({"error": "concurrency must be at least 1"}), 400
+
+    schedule_id = str(uuid.uuid4())
+    store.create_schedule(
+        schedule_id, kind, config,
+        interval_seconds=interval,
+        cron=cron,
+        key_fields=key_fields,
+        stop_after_unchanged=stop_after,
+        next_run=time.time() if data.get('run_now', True) else next_run,
+    )
+    return jsonify({"schedule_id": schedule_id})
+
+@app.route('/schedules', methods=['GET'])
+def list_schedules():
+    return jsonify(store.list_schedules())
+
+@app.route('/schedules/<schedule_id>', methods=['GET'])
+def get_schedule(schedule_id):
+    schedule = store.get_schedule(schedule_id)
+    if not schedule:
+        return jsonify({"error": "Schedule not found"}), 404
+    return jsonify(schedule)
+
+@app.route('/schedules/<schedule_id>', methods=['DELETE'])
+def delete_schedule(schedule_id):
+    if not store.delete_schedule(schedule_id):
+        return jsonify({"error": "Schedule not found"}), 404
+    return jsonify({"success": True})
+
+@app.route('/schedules/<schedule_id>/run', methods=['POST'])
+def trigger_schedule(schedule_id):
+    schedule = store.get_schedule(schedule_id)
+    if not schedule:
+        return jsonify({"error": "Schedule not found"}), 404
+    return jsonify({"job_id": launch_schedule(schedule)})
+
 @app.route('/status/<job_id>', methods=['GET'])
 def check_status(job_id):
-    job = jobs.get(job_id)
+    job = store.get_job(job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
+    job["result_count"] = store.count_results(job_id)
     return jsonify(job)
 
+def result_query_args():
+    """Read source_url / q / field.<name> filters from the query string."""
+    filters = {k[len("field."):]: v for k, v in request.args.items() if k.startswith("field.")}
+    return {
+        "source_url": request.args.get("source_url"),
+        "filters": filters,
+        "search": request.args.get("q"),
+    }
+
+@app.route('/results/<job_id>', methods=['GET'])
+def list_results(job_id):
+    if not store.get_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        limit = int(request.args.get("limit", 100))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    query = result_query_args()
+    return jsonify({
+        "total": store.count_results(job_id, **query),
+        "limit": limit,
+        "offset": offset,
+        "results": store.get_results(job_id, limit=limit, offset=offset, **query),
+    })
+
+@app.route('/results/<job_id>/count', methods=['GET'])
+def count_results(job_id):
+    if not store.get_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"count": store.count_results(job_id, **result_query_args())})
+
 @app.route('/download/<job_id>/<format>', methods=['GET'])
 def download_results(job_id, format):
-    # In a real API, we would generate the file and serve it.
-    # For now, the extension will handle the JSON response from /status and convert it to CSV/Excel if needed,
-    # or we can return the raw data here.
-    job = jobs.get(job_id)
+    # Results are streamed from the store so large jobs are never held in memory.
+    job = store.get_job(job_id)
     if not job or job['status'] != 'completed':
         return jsonify({"error": "Job not ready"}), 400
-    
-    return jsonify(job['results'])
+
+    if format == "csv":
+        columns = store.result_fields(job_id)
+
+        def generate_csv():
+            buf = io.StringIO()
+            out = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+            out.writeheader()
+            for row in store.iter_results(job_id):
+                out.writerow(row)
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate(0)
+            yield buf.getvalue()
+
+        return Response(generate_csv(), mimetype="text/csv",
+                        headers={"Content-Disposition": f"attachment; filename={job_id}.csv"})
+
+    def generate_json():
+        yield "["
+        for i, row in enumerate(store.iter_results(job_id)):
+            yield ("," if i else "") + json.dumps(row, ensure_ascii=False)
+        yield "]"
+
+    return Response(generate_json(), mimetype="application/json",
+                    headers={"Content-Disposition": f"attachment; filename={job_id}.json"})
 
 if __name__ == '__main__':
     print("Starting Scraper API on http://localhost:5000")
+    scheduler.start()
     app.run(host='0.0.0.0', port=5000)
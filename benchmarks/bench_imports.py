@@ -0,0 +1,79 @@
+"""
+Import-time benchmark: how long a fresh interpreter needs to import each
+module, and how much memory it holds afterwards.
+
+    python benchmarks/bench_imports.py [--repeat 5]
+
+Every measurement runs in a new subprocess so module caches never leak
+between samples.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    # Project entry points (should stay cheap thanks to lazy imports)
+    "scraper",
+    "cli",
+    "crawler",
+    "store",
+    # Heavy dependencies, loaded only by the modes that need them
+    "requests",
+    "bs4",
+    "pandas",
+    "selenium.webdriver",
+]
+
+PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+except ImportError:
+    rss = -1
+heavy = sorted(m for m in ("pandas", "requests", "bs4", "selenium") if m in sys.modules)
+print(elapsed, rss, ",".join(heavy))
+"""
+
+
+def measure(module, repeat):
+    times, rss, heavy = [], 0, ""
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return None
+        elapsed, rss, *rest = proc.stdout.split()
+        heavy = rest[0] if rest else ""
+        times.append(float(elapsed))
+    return statistics.median(times), int(rss), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'import ms':>10} {'max RSS KB':>11}  heavy deps loaded")
+    for module in MODULES:
+        result = measure(module, args.repeat)
+        if result is None:
+            print(f"{module:<20} {'not installed':>10}")
+            continue
+        seconds, rss, heavy = result
+        print(f"{module:<20} {seconds * 1000:>10.1f} {rss:>11}  {heavy or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Headless command-line entry point: ``python -m scraper``.
+
+Run a single job from flags, or one or more jobs from a JSON config file:
+
+    python -m scraper https://example.com/products -f title=h2.title -f price=.price --format json
+    python -m scraper --config jobs.json
+
+A config file holds one job object or a list of them. Job keys are the
+keyword arguments of ``scrape_site`` (or ``crawl_site`` with
+``"mode": "crawl"``), plus ``output`` and ``formats`` for ``save_data``.
+"""
+import argparse
+import json
+import sys
+import time
+
+from scraper import save_data, scrape_site
+
+
+def field_arg(value):
+    name, sep, selector = value.partition("=")
+    if not (sep and name and selector):
+        raise argparse.ArgumentTypeError(f"expected NAME=SELECTOR, got {value!r}")
+    return name, selector
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Run scraping jobs headlessly.")
+    parser.add_argument("url", nargs="?", help="Target URL (start URL in crawl mode)")
+    parser.add_argument("--config", help="JSON file with one job or a list of jobs")
+    parser.add_argument("--crawl", action="store_true", help="Crawl the site instead of following one 'next' chain")
+    parser.add_argument("-f", "--field", action="append", default=[], type=field_arg, metavar="NAME=SELECTOR",
+                        help="Manual field selector (repeatable)")
+    parser.add_argument("--auto", action="store_true", help="Auto-discover items instead of manual fields")
+    parser.add_argument("--next-selector", help="CSS selector of the 'next' link")
+    parser.add_argument("--max-pages", type=int, help="Maximum pages to fetch")
+    parser.add_argument("--all", action="store_true", help="Follow pagination until the end")
+    parser.add_argument("--max-depth", type=int, help="Link depth limit in crawl mode")
+    parser.add_argument("--allow", action="append", help="Regex of URLs to crawl (repeatable)")
+    parser.add_argument("--deny", action="append", help="Regex of URLs to skip (repeatable)")
+    parser.add_argument("--selenium", action="store_true", help="Render pages with Selenium")
+    parser.add_argument("--tor", action="store_true", help="Route traffic through Tor")
+    parser.add_argument("--proxy", action="append", metavar="URL",
+                        help="Proxy URL for the proxy pool, e.g. socks5h://host:1080 (repeatable)")
+    parser.add_argument("--tor-port", action="append", type=int, metavar="PORT",
+                        help="Local Tor SocksPort for the proxy pool (repeatable)")
+    parser.add_argument("--proxy-strategy", choices=["per_host", "per_request"], default="per_request",
+                        help="Assign pool proxies per target host or per request")
+    parser.add_argument("--concurrency", type=int, help="Parallel fetches in crawl mode")
+    parser.add_argument("--delay", type=float, nargs=2, metavar=("MIN", "MAX"), help="Delay between requests")
+    parser.add_argument("--timeout", type=int, help="Request timeout in seconds")
+    parser.add_argument("--retries", type=int, help="Request retries")
+    parser.add_argument("-o", "--output", default="scraped_data", help="Output filename without extension")
+    parser.add_argument("--format", action="append", dest="formats", choices=["csv", "xlsx", "json"],
+                        help="Output format (repeatable, default: json)")
+    return parser
+
+
+CRAWL_ONLY = {"max_depth", "allow", "deny", "concurrency"}
+SCRAPE_ONLY = {"next_selector", "scrape_all"}
+
+
+def job_from_args(args):
+    job = {"mode": "crawl" if args.crawl else "scrape", "output": args.output,
+           "formats": args.formats or ["json"]}
+    job["start_urls" if args.crawl else "base_url"] = args.url
+    if args.field:
+        job["fields"] = dict(args.field)
+    options = {
+        "auto_mode": args.auto or None,
+        "next_selector": args.next_selector,
+        "max_pages": args.max_pages,
+        "scrape_all": args.all or None,
+        "max_depth": args.max_depth,
+        "allow": args.allow,
+        "deny": args.deny,
+        "use_selenium": args.selenium or None,
+        "use_tor": args.tor or None,
+        "delay_range": tuple(args.delay) if args.delay else None,
+        "request_timeout": args.timeout,
+        "request_retries": args.retries,
+        "concurrency": args.concurrency,
+    }
+    if args.proxy or args.tor_port:
+        options["proxy_pool"] = {"proxies": args.proxy, "tor_ports": args.tor_port,
+                                 "strategy": args.proxy_strategy}
+    skip = SCRAPE_ONLY if args.crawl else CRAWL_ONLY
+    job.update({k: v for k, v in options.items() if v is not None and k not in skip})
+    return job
+
+
+def load_jobs(path):
+    with open(path, encoding="utf-8") as f:
+        jobs = json.load(f)
+    jobs = jobs if isinstance(jobs, list) else [jobs]
+    if not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("a config file holds one job object or a list of them")
+    return jobs
+
+
+def run_job(job):
+    job = dict(job)
+    mode = job.pop("mode", "scrape")
+    output = job.pop("output", "scraped_data")
+    formats = job.pop("formats", ["json"])
+    if "delay_range" in job:
+        job["delay_range"] = tuple(job["delay_range"])
+
+    if mode == "crawl":
+        from crawler import crawl_site
+        if "url" in job:
+            job["start_urls"] = job.pop("url")
+        results = crawl_site(**job)
+    else:
+        if "url" in job:
+            job["base_url"] = job.pop("url")
+        results = scrape_site(**job)
+    return results, save_data(results, output, formats=formats)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        try:
+            jobs = load_jobs(args.config)
+        except (OSError, ValueError) as e:
+            print(f"Cannot load config {args.config}: {e}", file=sys.stderr)
+            return 1
+    elif args.url:
+        if args.concurrency is not None and args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+        jobs = [job_from_args(args)]
+    else:
+        parser.error("a URL or --config is required")
+
+    failed = 0
+    for job in jobs:
+        start = time.time()
+        try:
+            results, saved = run_job(job)
+        except Exception as e:
+            failed += 1
+            print(f"Job failed ({job.get('url') or job.get('base_url') or job.get('start_urls')}): {e}",
+                  file=sys.stderr)
+            continue
+        print(f"Scraped {len(results)} items in {time.time() - start:.1f}s"
+              + (f" -> {', '.join(saved)}" if saved else ""))
+    return 1 if failed else 0
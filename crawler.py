@@ -0,0 +1,255 @@
+import heapq
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from proxies import make_proxy_pool
+from scraper import clean_data, extract_items, fetch_html
+
+
+# Query parameters that only track the visitor and never change page content.
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid"}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+
+# URL CANONICALIZATION
+def canonicalize_url(url, strip_params: Optional[Iterable[str]] = None):
+    """
+    Normalize a URL so that trivially different spellings of the same page
+    (host case, default port, fragment, dot segments, tracking params,
+    query order) collapse to one key. The result is a dedup key only; the
+    crawler always fetches the URL as it was found.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    userinfo = parts.netloc.rpartition("@")[0]
+    port = parts.port
+    netloc = f"{userinfo}@{host}" if userinfo else host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{netloc}:{port}"
+
+    segments = []
+    for seg in parts.path.lstrip("/").split("/"):
+        if seg == "..":
+            if segments:
+                segments.pop()
+        elif seg != ".":
+            segments.append(seg)
+    path = "/" + "/".join(segments)
+
+    drop = set(strip_params or ()) | TRACKING_PARAMS
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in drop and not k.startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+
+# URL FRONTIER
+class URLFrontier:
+    """
+    Priority queue of URLs to visit. URLs are deduplicated on their
+    canonical form but queued and returned as given; lower priority values
+    are popped first, then shallower depth, then insertion order.
+    """
+
+    def __init__(self, strip_params: Optional[Iterable[str]] = None):
+        self._heap = []
+        self._seen = set()
+        self._counter = 0
+        self.strip_params = set(strip_params or ())
+
+    def add(self, url, depth=0, priority=0):
+        key = canonicalize_url(url, self.strip_params)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (priority, depth, self._counter, url))
+        self._counter += 1
+        return True
+
+    def pop(self):
+        priority, depth, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def seen(self, url):
+        return canonicalize_url(url, self.strip_params) in self._seen
+
+    def __len__(self):
+        return len(self._heap)
+
+
+
+# ROUTING
+def match_route(url, routes):
+    """Return the first route whose `pattern` regex matches the URL, or None."""
+    for route in routes or []:
+        if re.search(route["pattern"], url):
+            return route
+    return None
+
+
+def is_allowed(url, allow=None, deny=None):
+    if any(re.search(p, url) for p in deny or []):
+        return False
+    if allow:
+        return any(re.search(p, url) for p in allow)
+    return True
+
+
+def extract_links(html, page_url, link_selector="a[href]"):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a in soup.select(link_selector):
+        href = a.get("href")
+        if not href:
+            continue
+        url = urljoin(page_url, href)
+        if urlsplit(url).scheme in ("http", "https"):
+            links.append(url)
+    return links
+
+
+
+# SITE CRAWLER
+def crawl_site(start_urls, routes=None, fields=None, auto_mode=False,
+               allow: Optional[List[str]] = None, deny: Optional[List[str]] = None,
+               max_depth: int = 2, max_pages: int = 100, same_domain: bool = True,
+               strip_params: Optional[Iterable[str]] = None,
+               link_selector: str = "a[href]",
+               use_selenium=False, infinite_scroll=False, load_more_selector=None,
+               use_tor=False,
+               delay_range: Tuple[float, float] = (1, 2),
+               progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+               normalize_urls: bool = True,
+               request_timeout: int = 20,
+               request_retries: int = 2,
+               request_backoff: float = 1.5,
+               page_callback: Optional[Callable[[str, list], None]] = None,
+               collect_results: bool = True,
+               proxy_pool=None,
+               concurrency: int = 1,
+               error_callback: Optional[Callable[[str, Exception], None]] = None):
+    """
+    Crawl a site breadth-first from one or more start URLs.
+
+    `routes` is an ordered list of dicts mapping URL patterns to extraction
+    configs, e.g. {"pattern": r"/product/", "fields": {...}, "priority": 10}.
+    Supported keys: `pattern` (regex, required), `fields`, `auto_mode`,
+    `priority` (lower is crawled first, default 0), `follow` (whether to
+    collect links from matching pages, default True) and `link_selector`.
+    Pages matching no route use the top-level `fields` / `auto_mode`; if
+    neither is given they are only used for link discovery.
+    `page_callback` / `collect_results` behave as in `scrape_site`; a False
+    return from `page_callback` ends the crawl.
+    With `concurrency` > 1 pages are fetched in parallel batches, typically
+    spread over the proxies of `proxy_pool` (see `scrape_site`).
+    Pages that fail to fetch are skipped and reported to
+    `error_callback(page_url, exception)`.
+    """
+    if isinstance(start_urls, str):
+        start_urls = [start_urls]
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    proxy_pool = make_proxy_pool(proxy_pool)
+
+    ua_list = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)",
+        "Mozilla/5.0 (X11; Linux x86_64)"
+    ]
+    default_route = {"fields": fields, "auto_mode": auto_mode, "priority": 0}
+    hosts = {urlsplit(u).hostname for u in start_urls}
+    frontier = URLFrontier(strip_params)
+    for url in start_urls:
+        route = match_route(url, routes) or default_route
+        frontier.add(url, depth=0, priority=route.get("priority", 0))
+
+    def fetch_page(page_url):
+        try:
+            return fetch_html(
+                page_url,
+                use_selenium,
+                ua_list,
+                infinite_scroll,
+                load_more_selector,
+                use_tor=use_tor,
+                timeout=request_timeout,
+                retries=request_retries,
+                backoff=request_backoff,
+                proxy_pool=proxy_pool,
+            ), None
+        except Exception as e:
+            return None, e
+
+    all_data = []
+    page_count = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+
+    try:
+        while frontier and page_count < max_pages:
+            # Fetch up to `concurrency` pages at once, then process them in frontier order
+            batch = []
+            while frontier and len(batch) < min(concurrency, max_pages - page_count):
+                batch.append(frontier.pop())
+            urls = [url for url, _ in batch]
+            pages = executor.map(fetch_page, urls) if executor else map(fetch_page, urls)
+
+            stop = False
+            for (page_url, depth), (html, error) in zip(batch, pages):
+                if error is not None:
+                    print(f"Skipping {page_url}: {error}")
+                    if error_callback:
+                        error_callback(page_url, error)
+                    continue
+                page_count += 1
+                route = match_route(page_url, routes) or default_route
+
+                if route.get("auto_mode") or route.get("fields"):
+                    items = extract_items(
+                        html,
+                        page_url,
+                        fields=route.get("fields"),
+                        auto_mode=route.get("auto_mode", False),
+                        normalize_urls=normalize_urls,
+                    )
+                    if collect_results:
+                        all_data.extend(items)
+                    if items and page_callback and page_callback(page_url, items) is False:
+                        stop = True
+
+                if not stop and depth < max_depth and route.get("follow", True):
+                    for link in extract_links(html, page_url, route.get("link_selector", link_selector)):
+                        if same_domain and urlsplit(link).hostname not in hosts:
+                            continue
+                        if not is_allowed(link, allow, deny):
+                            continue
+                        link_route = match_route(link, routes) or default_route
+                        frontier.add(link, depth=depth + 1, priority=link_route.get("priority", 0))
+
+                if progress_callback:
+                    progress_callback(page_count, max_pages)
+                if stop:
+                    break
+            if stop:
+                break
+
+            if frontier and delay_range and delay_range[1] > 0:
+                time.sleep(random.uniform(delay_range[0], delay_range[1]))
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return clean_data(all_data)
@@ -175,11 +175,11 @@ async function checkStatus() {
     if (data.status === "completed") {
       clearInterval(pollInterval);
       document.getElementById("status-text").innerText =
-        `✅ Completed! Scraped ${data.results.length} items.`;
+        `✅ Completed! Scraped ${data.result_count} items.`;
       document.getElementById("progress-fill").style.width = "100%";
       document.getElementById("results-actions").classList.remove("hidden");
       document.getElementById("start-btn").disabled = false;
-      window.lastResults = data.results; // Store for download
+      window.lastJobId = currentJobId; // Store for download
     } else if (data.status === "failed") {
       clearInterval(pollInterval);
       document.getElementById("status-text").innerText =
@@ -204,40 +204,12 @@ async function checkStatus() {
 }
 
 function downloadResults(format) {
-  if (!window.lastResults) return;
-
-  let content = "";
-  let type = "";
-  let ext = "";
-
-  if (format === "json") {
-    content = JSON.stringify(window.lastResults, null, 2);
-    type = "application/json";
-    ext = "json";
-  } else if (format === "csv") {
-    // Simple CSV converter
-    const items = window.lastResults;
-    const headers = [...new Set(items.flatMap(Object.keys))];
-    content = headers.join(",") + "\n";
-    content += items
-      .map((item) => {
-        return headers
-          .map((h) => {
-            const val = item[h] || "";
-            return `"${String(val).replace(/"/g, '""')}"`;
-          })
-          .join(",");
-      })
-      .join("\n");
-    type = "text/csv";
-    ext = "csv";
-  }
+  if (!window.lastJobId) return;
 
-  const blob = new Blob([content], { type: type });
-  const url = URL.createObjectURL(blob);
+  // The API streams results from its store in the requested format
   const a = document.createElement("a");
-  a.href = url;
-  a.download = `scraped_data.${ext}`;
+  a.href = `${API_URL}/download/${window.lastJobId}/${format}`;
+  a.download = `scraped_data.${format}`;
   document.body.appendChild(a);
   a.click();
   document.body.removeChild(a);
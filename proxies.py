@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+DEFAULT_TOR_HOST = "127.0.0.1"
+
+
+
+# PROXY
+class Proxy:
+    """
+    One SOCKS/HTTP proxy endpoint (or Tor SOCKS port) with its health stats:
+    an exponentially weighted latency average, success/failure counts and
+    a cooldown after repeated consecutive failures.
+    """
+
+    def __init__(self, url, isolate=False):
+        self.url = url
+        self.isolate = isolate
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def failure_rate(self):
+        total = self.successes + self.failures
+        return self.failures / total if total else 0.0
+
+    def healthy(self, now=None):
+        return (now or time.time()) >= self.cooldown_until
+
+    def score(self, default_latency):
+        """Lower is better: expected latency inflated by the failure rate."""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + 4 * self.failure_rate)
+
+    def with_credentials(self, token):
+        """
+        Proxy URL carrying SOCKS credentials. Tor (IsolateSOCKSAuth, on by
+        default) builds a separate circuit for every distinct username and
+        password, which isolates streams without extra Tor configuration.
+        """
+        parts = urlsplit(self.url)
+        if "@" in parts.netloc:
+            # Keep credentials the proxy itself requires
+            return self.url
+        return urlunsplit((parts.scheme, f"{token}:{token}@{parts.netloc}", parts.path, "", ""))
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "successes": self.successes,
+            "failures": self.failures,
+            "failure_rate": round(self.failure_rate, 3),
+            "healthy": self.healthy(),
+        }
+
+
+
+# PROXY POOL
+class ProxyPool:
+    """
+    Hands out proxies for outgoing requests and steers traffic toward the
+    fastest healthy ones.
+
+    `strategy="per_request"` (the default) picks a proxy for every request.
+    `"per_host"` gives each target host a group of up to `host_spread`
+    proxies and spreads its requests over them; a group member that
+    becomes unhealthy, or `repick_ratio` times slower than the best healthy
+    proxy, is replaced. Picks are weighted by 1/score, so slower proxies
+    still get a little traffic and their stats stay fresh. With
+    `isolate_streams` SOCKS proxies get per-host (or per-request)
+    credentials, so Tor routes them over separate circuits.
+    """
+
+    def __init__(self, proxies: Iterable, strategy="per_request", isolate_streams=False,
+                 ewma_alpha=0.3, max_failures=3, cooldown=60.0, host_spread=2, repick_ratio=3.0):
+        if strategy not in ("per_host", "per_request"):
+            raise ValueError("strategy must be 'per_host' or 'per_request'")
+        self.proxies = [p if isinstance(p, Proxy) else Proxy(p, isolate_streams) for p in proxies]
+        if not self.proxies:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.host_spread = max(1, host_spread)
+        self.repick_ratio = repick_ratio
+        self._by_host: Dict[str, List[Proxy]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tor_ports(cls, ports, host=DEFAULT_TOR_HOST, isolate_streams=True, **kwargs):
+        """Pool over several local Tor SocksPorts, each with its own circuits."""
+        return cls([f"socks5h://{host}:{port}" for port in ports],
+                   isolate_streams=isolate_streams, **kwargs)
+
+    def _default_latency(self, healthy):
+        known = [p.latency for p in healthy if p.latency is not None]
+        # Untried proxies are assumed as fast as the best known one, so they get tried
+        return min(known) if known else 1.0
+
+    def _choose(self, candidates, default_latency):
+        weights = [1.0 / max(p.score(default_latency), 1e-3) for p in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    def _pick(self, now):
+        healthy = [p for p in self.proxies if p.healthy(now)]
+        if not healthy:
+            # Everything is cooling down: use whichever recovers first
+            return min(self.proxies, key=lambda p: p.cooldown_until)
+        return self._choose(healthy, self._default_latency(healthy))
+
+    def _host_group(self, host, now):
+        """Refresh and return the proxies serving `host` under `per_host`."""
+        healthy = [p for p in self.proxies if p.healthy(now)]
+        if not healthy:
+            return [self._pick(now)]
+        default_latency = self._default_latency(healthy)
+        best = min(p.score(default_latency) for p in healthy)
+        group = [p for p in self._by_host.get(host, [])
+                 if p.healthy(now) and p.score(default_latency) <= best * self.repick_ratio]
+        while len(group) < min(self.host_spread, len(healthy)):
+            group.append(self._choose([p for p in healthy if p not in group], default_latency))
+        self._by_host[host] = group
+        return group
+
+    def acquire(self, url):
+        """
+        Choose a proxy for `url`. Returns (proxy, proxy_url); pass the
+        proxy back to `report()` once the request finishes.
+        """
+        host = urlsplit(url).hostname or ""
+        now = time.time()
+        with self._lock:
+            if self.strategy == "per_host":
+                group = self._host_group(host, now)
+                proxy = self._choose(group, self._default_latency(group))
+            else:
+                proxy = self._pick(now)
+
+        proxy_url = proxy.url
+        if proxy.isolate and proxy.url.startswith("socks"):
+            token = host if self.strategy == "per_host" else uuid.uuid4().hex
+            proxy_url = proxy.with_credentials(token or "default")
+        return proxy, proxy_url
+
+    def report(self, proxy, ok, latency=None):
+        """Record the outcome of a request made through `proxy`."""
+        with self._lock:
+            if ok:
+                proxy.successes += 1
+                proxy.consecutive_failures = 0
+                if latency is not None:
+                    if proxy.latency is None:
+                        proxy.latency = latency
+                    else:
+                        proxy.latency += self.ewma_alpha * (latency - proxy.latency)
+            else:
+                proxy.failures += 1
+                proxy.consecutive_failures += 1
+                if proxy.consecutive_failures >= self.max_failures:
+                    proxy.cooldown_until = time.time() + self.cooldown
+                    proxy.consecutive_failures = 0
+                    for group in self._by_host.values():
+                        if proxy in group:
+                            group.remove(proxy)
+
+    def probe(self, test_url, timeout=10):
+        """Fetch `test_url` once through every proxy to seed latency stats."""
+        import requests
+        for proxy in self.proxies:
+            proxy_url = proxy.url
+            if proxy.isolate and proxy.url.startswith("socks"):
+                proxy_url = proxy.with_credentials("probe")
+            start = time.perf_counter()
+            try:
+                requests.get(test_url, proxies={"http": proxy_url, "https": proxy_url},
+                             timeout=timeout).raise_for_status()
+                self.report(proxy, True, time.perf_counter() - start)
+            except requests.RequestException:
+                self.report(proxy, False)
+        return self.stats()
+
+    def stats(self):
+        with self._lock:
+            return [p.stats() for p in self.proxies]
+
+
+def make_proxy_pool(spec) -> Optional[ProxyPool]:
+    """
+    Build a pool from a JSON-friendly spec: a list of proxy URLs, or a dict
+    with `proxies` and/or `tor_ports` plus ProxyPool options. ProxyPool
+    instances and None pass through unchanged.
+    """
+    if spec is None or isinstance(spec, ProxyPool):
+        return spec
+    if isinstance(spec, (list, tuple)):
+        return ProxyPool(spec)
+    spec = dict(spec)
+    host = spec.pop("tor_host", DEFAULT_TOR_HOST)
+    isolate = spec.pop("isolate_streams", None)
+    proxies = [Proxy(url, bool(isolate)) for url in spec.pop("proxies", None) or []]
+    # Tor ports isolate streams unless explicitly turned off
+    proxies += [Proxy(f"socks5h://{host}:{port}", isolate is not False)
+                for port in spec.pop("tor_ports", None) or []]
+    return ProxyPool(proxies, **spec)
@@ -0,0 +1,225 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from scraper import clean_data, scrape_site
+from crawler import crawl_site
+from store import row_hash
+
+
+RUNNERS = {"scrape": scrape_site, "crawl": crawl_site}
+
+
+
+# CRON EXPRESSIONS
+CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = end = int(part)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expr):
+    """
+    Parse a 5-field cron expression (minute hour day-of-month month
+    day-of-week) into sets of allowed values. Sunday is 0 (or 7).
+    """
+    parts = expr.split()
+    if len(parts) != 5:
+        raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+    fields = []
+    for i, (part, (low, high)) in enumerate(zip(parts, CRON_RANGES)):
+        if i == 4:
+            fields.append({v % 7 for v in parse_cron_field(part, 0, 7)})
+        else:
+            fields.append(parse_cron_field(part, low, high))
+    # A day field starting with "*" (e.g. "*/2") counts as unrestricted
+    return fields, not parts[2].startswith("*"), not parts[4].startswith("*")
+
+
+def next_cron_time(expr, after=None):
+    """Return the first timestamp strictly after `after` matching the cron expression."""
+    (minutes, hours, days, months, weekdays), dom_set, dow_set = parse_cron(expr)
+    t = datetime.fromtimestamp(after or time.time()).replace(second=0, microsecond=0)
+    t += timedelta(minutes=1)
+    limit = t + timedelta(days=366 * 5)
+
+    while t < limit:
+        if t.month not in months:
+            t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            continue
+        day_ok = t.day in days
+        dow_ok = (t.weekday() + 1) % 7 in weekdays
+        # Standard cron: if both day fields are restricted, either may match
+        if (day_ok or dow_ok) if (dom_set and dow_set) else (day_ok and dow_ok):
+            if t.hour not in hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute in minutes:
+                return t.timestamp()
+            t += timedelta(minutes=1)
+        else:
+            t = t.replace(hour=0, minute=0) + timedelta(days=1)
+    raise ValueError(f"Cron expression never matches: {expr!r}")
+
+
+def next_run_time(schedule, after=None):
+    after = after or time.time()
+    if schedule.get("cron"):
+        return next_cron_time(schedule["cron"], after)
+    return after + schedule["interval_seconds"]
+
+
+
+# DELTA TRACKING
+class DeltaTracker:
+    """
+    Compares each page of records with the fingerprints stored by previous
+    runs of a schedule and stores only added or changed records, tagged
+    with a `_change` field. Records are keyed by `key_fields` (default:
+    `link` when present, otherwise the whole record).
+    """
+
+    def __init__(self, store, schedule_id, job_id, key_fields=None):
+        self.store = store
+        self.schedule_id = schedule_id
+        self.job_id = job_id
+        self.key_fields = key_fields
+        self._seen = set()
+
+    def record_key(self, record):
+        if self.key_fields:
+            return json.dumps([record.get(f) for f in self.key_fields], ensure_ascii=False)
+        if record.get("link"):
+            return record["link"]
+        return row_hash({k: v for k, v in record.items() if k != "source_url"})
+
+    def diff_page(self, items):
+        """Store and return the page's delta together with its fingerprints."""
+        page = {}
+        for record in clean_data(items):
+            key = self.record_key(record)
+            if key not in self._seen:
+                page[key] = record
+        self._seen.update(page)
+
+        previous = self.store.get_fingerprints(self.schedule_id, page.keys())
+        delta, changed, unchanged = [], [], []
+        for key, record in page.items():
+            fp = row_hash({k: v for k, v in record.items() if k != "source_url"})
+            old = previous.get(key)
+            if old == fp:
+                unchanged.append(key)
+                continue
+            changed.append((key, fp, record))
+            delta.append(dict(record, _change="added" if old is None else "changed"))
+
+        self.store.apply_delta(self.schedule_id, self.job_id, delta, changed, unchanged)
+        return delta
+
+    def removed(self):
+        """Store and return records from earlier runs not seen in this (complete) run."""
+        return self.store.apply_removals(self.schedule_id, self.job_id)
+
+
+def run_schedule(store, schedule, job_id, progress_callback=None):
+    """
+    Run one scheduled job, writing only the delta against the previous run
+    to the store, page by page. After `stop_after_unchanged` consecutive
+    pages with no added or changed records pagination stops early. Removed
+    records are only reported for runs that were neither cut short nor
+    missing pages because of fetch errors.
+    """
+    tracker = DeltaTracker(store, schedule["id"], job_id, schedule.get("key_fields"))
+    stop_after = schedule.get("stop_after_unchanged")
+    state = {"unchanged": 0, "stopped": False, "fetch_errors": 0}
+
+    def page_callback(page_url, items):
+        delta = tracker.diff_page(items)
+        state["unchanged"] = 0 if delta else state["unchanged"] + 1
+        if stop_after and state["unchanged"] >= stop_after:
+            state["stopped"] = True
+            return False
+
+    def error_callback(page_url, error):
+        state["fetch_errors"] += 1
+
+    options = {"error_callback": error_callback} if schedule["kind"] == "crawl" else {}
+    RUNNERS[schedule["kind"]](
+        progress_callback=progress_callback,
+        page_callback=page_callback,
+        collect_results=False,
+        **options,
+        **schedule["config"],
+    )
+    complete = not state["stopped"] and not state["fetch_errors"]
+    if complete:
+        tracker.removed()
+    return complete
+
+
+
+# SCHEDULER
+class Scheduler:
+    """
+    Background thread that polls the store for due schedules and hands
+    each one to `launch(schedule)`. A schedule's next run is computed
+    before launching, so the next poll does not pick it up again.
+    """
+
+    def __init__(self, store, launch, poll_interval=15):
+        self.store = store
+        self.launch = launch
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_due(self, now=None):
+        now = now or time.time()
+        for schedule in self.store.due_schedules(now):
+            try:
+                next_run = next_run_time(schedule, now)
+            except (TypeError, ValueError) as e:
+                # Can never fire (e.g. "0 0 31 2 *"): disable it instead of retrying every poll
+                print(f"Disabling schedule {schedule['id']}: {e}")
+                self.store.update_schedule(schedule["id"], enabled=0)
+                continue
+            try:
+                self.store.update_schedule(schedule["id"], next_run=next_run)
+                self.launch(schedule)
+            except Exception as e:
+                print(f"Failed to launch schedule {schedule['id']}: {e}")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Scheduler poll failed: {e}")
+            self._stop.wait(self.poll_interval)
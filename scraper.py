@@ -3,12 +3,11 @@ import time
 import re
 import json
 from typing import Callable, Iterable, Optional, Tuple
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+
+# pandas, requests, BeautifulSoup and Selenium are imported inside the
+# functions that need them, so light jobs (requests + JSON output) and the
+# CLI start without paying for the heavy dependencies.
 
 
   
@@ -23,28 +22,43 @@ def fetch_html(
     timeout=20,
     retries=2,
     backoff=1.5,
+    proxy_pool=None,
 ):
     """
     Fetch fully rendered HTML from a page.
-    Supports routing through Tor SOCKS5 proxy if use_tor=True.
+    Supports routing through Tor SOCKS5 proxy if use_tor=True, or through a
+    `proxies.ProxyPool`, which picks the proxy and records its latency and
+    failures (takes precedence over use_tor).
     """
     headers = {"User-Agent": random.choice(user_agents or ["Mozilla/5.0"])}
 
     if use_selenium:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.add_argument("--headless=new")  # Use new headless mode to reduce logs
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
         options.add_argument(f"--user-agent={headers['User-Agent']}")
-        if use_tor:
+        proxy = None
+        if proxy_pool:
+            # Chrome cannot send SOCKS credentials, so no stream isolation here
+            proxy, _ = proxy_pool.acquire(url)
+            options.add_argument(f"--proxy-server={proxy.url.replace('socks5h://', 'socks5://')}")
+        elif use_tor:
             # Route Chrome through Tor proxy at 127.0.0.1:9050 (default Tor SOCKS5)
             options.add_argument('--proxy-server=socks5://127.0.0.1:9050')
         driver = webdriver.Chrome(options=options)
         try:
             print(f"Navigating to URL in Selenium: {url}")  # Debug log for URL loading
+            start = time.perf_counter()
             driver.get(url)
+            if proxy:
+                proxy_pool.report(proxy, True, time.perf_counter() - start)
         except Exception as e:
             print(f"Exception loading URL in Selenium: {e}")
+            if proxy:
+                proxy_pool.report(proxy, False)
             driver.quit()
             raise
 
@@ -78,6 +92,7 @@ def fetch_html(
         return html
 
     else:
+        import requests
         proxies = None
         if use_tor:
             proxies = {
@@ -87,11 +102,22 @@ def fetch_html(
         session = requests.Session()
         last_err = None
         for attempt in range(retries + 1):
+            proxy = None
+            if proxy_pool:
+                # Re-acquire on every attempt so a failing proxy can be swapped out
+                proxy, proxy_url = proxy_pool.acquire(url)
+                proxies = {'http': proxy_url, 'https': proxy_url}
             try:
+                start = time.perf_counter()
                 res = session.get(url, headers=headers, timeout=timeout, proxies=proxies)
+                if proxy:
+                    # Any HTTP response means the proxy itself worked
+                    proxy_pool.report(proxy, True, time.perf_counter() - start)
                 res.raise_for_status()
                 return res.text
             except requests.RequestException as e:
+                if proxy and e.response is None:
+                    proxy_pool.report(proxy, False)
                 last_err = e
                 if attempt >= retries:
                     break
@@ -104,6 +130,7 @@ def fetch_html(
   
 # AUTO-DETECT COMMON FIELDS
 def auto_detect_common_fields(html):
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
 
     def get_selector(elem):
@@ -139,6 +166,7 @@ def auto_detect_common_fields(html):
   
 # AUTO-DISCOVER MODE
 def auto_discover_items(html):
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
     rows = soup.select("table tr")
     if len(rows) > 1:
@@ -165,6 +193,7 @@ def auto_discover_items(html):
 def parse_with_fields(html, fields):
     if not fields:
         return []
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, 'html.parser')
     base_elems = soup.select(list(fields.values())[0])
     results = []
@@ -190,6 +219,24 @@ def parse_with_fields(html, fields):
 
 
   
+# PAGE EXTRACTION
+def extract_items(html, page_url, fields=None, auto_mode=False, normalize_urls=True):
+    """
+    Run the auto-discover or manual-fields extractor on one page and tag
+    every item with its source URL (resolving relative links if asked).
+    """
+    items = auto_discover_items(html) if auto_mode else parse_with_fields(html, fields)
+    for item in items:
+        item["source_url"] = page_url
+        if normalize_urls:
+            if "link" in item and item["link"]:
+                item["link"] = urljoin(page_url, item["link"])
+            if "image_url" in item and item["image_url"]:
+                item["image_url"] = urljoin(page_url, item["image_url"])
+    return items
+
+
+  
 # MAIN SCRAPER
 def scrape_site(base_url, fields=None, next_selector=None, use_selenium=False,
                 scrape_all=False, max_pages=1, auto_mode=False,
@@ -199,7 +246,22 @@ def scrape_site(base_url, fields=None, next_selector=None, use_selenium=False,
                 normalize_urls: bool = True,
                 request_timeout: int = 20,
                 request_retries: int = 2,
-                request_backoff: float = 1.5):
+                request_backoff: float = 1.5,
+                page_callback: Optional[Callable[[str, list], None]] = None,
+                collect_results: bool = True,
+                proxy_pool=None):
+    """
+    Scrape a paginated listing. `page_callback(page_url, items)` is called
+    as each page is extracted and may return False to stop pagination; with
+    `collect_results=False` items are only handed to the callback and not
+    accumulated in memory. `proxy_pool` is a `proxies.ProxyPool` or a spec
+    accepted by `proxies.make_proxy_pool`.
+    """
+
+    from bs4 import BeautifulSoup
+    from proxies import make_proxy_pool
+
+    proxy_pool = make_proxy_pool(proxy_pool)
 
     ua_list = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
@@ -225,23 +287,21 @@ def scrape_site(base_url, fields=None, next_selector=None, use_selenium=False,
             timeout=request_timeout,
             retries=request_retries,
             backoff=request_backoff,
+            proxy_pool=proxy_pool,
         )
-        items = auto_discover_items(html) if auto_mode else parse_with_fields(html, fields)
+        items = extract_items(html, page_url, fields=fields, auto_mode=auto_mode,
+                              normalize_urls=normalize_urls)
         if not items:
             break
-
-        for item in items:
-            item["source_url"] = page_url
-            if normalize_urls:
-                if "link" in item and item["link"]:
-                    item["link"] = urljoin(page_url, item["link"])
-                if "image_url" in item and item["image_url"]:
-                    item["image_url"] = urljoin(page_url, item["image_url"])
-        all_data.extend(items)
+        if collect_results:
+            all_data.extend(items)
+        stop = page_callback is not None and page_callback(page_url, items) is False
 
         if progress_callback:
             total = None if scrape_all else max_pages
             progress_callback(page_count, total)
+        if stop:
+            break
 
         soup = BeautifulSoup(html, 'html.parser')
         if not next_selector:
@@ -252,6 +312,8 @@ def scrape_site(base_url, fields=None, next_selector=None, use_selenium=False,
 
         if next_selector:
             if use_selenium:
+                from selenium import webdriver
+                from selenium.webdriver.chrome.options import Options
                 from selenium.webdriver.common.by import By
                 driver_opts = Options()
                 driver_opts.add_argument("--headless=new")
@@ -309,6 +371,7 @@ def save_data(data, filename_base, formats: Optional[Iterable[str]] = None):
     saved = []
     df = None
     if "csv" in formats or "xlsx" in formats:
+        import pandas as pd
         df = pd.DataFrame(data)
     if "csv" in formats:
         df.to_csv(filename_base + ".csv", index=False)
@@ -321,3 +384,9 @@ def save_data(data, filename_base, formats: Optional[Iterable[str]] = None):
             json.dump(data, f, ensure_ascii=False, indent=2)
         saved.append(filename_base + ".json")
     return saved
+
+
+if __name__ == "__main__":
+    import sys
+    from cli import main
+    sys.exit(main())
@@ -0,0 +1,357 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+from scraper import clean_data
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    config TEXT,
+    page INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    source_url TEXT,
+    row_hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_results_job_hash ON results (job_id, row_hash);
+CREATE INDEX IF NOT EXISTS idx_results_job_id ON results (job_id, id);
+CREATE INDEX IF NOT EXISTS idx_results_source_url ON results (job_id, source_url);
+CREATE TABLE IF NOT EXISTS schedules (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    config TEXT NOT NULL,
+    interval_seconds INTEGER,
+    cron TEXT,
+    key_fields TEXT,
+    stop_after_unchanged INTEGER,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    next_run REAL,
+    last_job_id TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_next_run ON schedules (enabled, next_run);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    schedule_id TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    last_seen_job TEXT NOT NULL,
+    PRIMARY KEY (schedule_id, record_key)
+);
+"""
+
+MAX_PAGE_SIZE = 1000
+
+
+def row_hash(row):
+    """Stable hash of a record, used to drop duplicates within a job."""
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+
+# RESULT STORE
+class ResultStore:
+    """
+    SQLite-backed job and result store (WAL mode). Each thread gets its own
+    connection, so scraper workers can write while API requests read.
+    """
+
+    def __init__(self, path="scraper_jobs.db"):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Jobs
+    def create_job(self, job_id, kind, config=None, total=None):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, config, total, created_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(config, default=str), total, now, now),
+            )
+
+    def update_progress(self, job_id, page, total=None):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET page = ?, total = ?, updated_at = ? WHERE id = ?",
+                (page, total, time.time(), job_id),
+            )
+
+    def finish_job(self, job_id, status="completed", error=None):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def mark_interrupted(self):
+        """Flag jobs left 'running' by a previous process as failed."""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', "
+                "updated_at = ? WHERE status = 'running'",
+                (time.time(),),
+            )
+
+    def get_job(self, job_id) -> Optional[Dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "config": json.loads(row["config"]) if row["config"] else None,
+            "progress": {"page": row["page"], "total": row["total"]},
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    # Results
+    def add_results(self, job_id, items: Iterable[Dict]):
+        """Insert a batch of records in one transaction, skipping duplicates."""
+        with self._conn() as conn:
+            return self._insert_results(conn, job_id, items)
+
+    def _insert_results(self, conn, job_id, items):
+        rows = [
+            (job_id, item.get("source_url"), row_hash(item), json.dumps(item, ensure_ascii=False))
+            for item in clean_data(items)
+        ]
+        if not rows:
+            return 0
+        cur = conn.executemany(
+            "INSERT OR IGNORE INTO results (job_id, source_url, row_hash, data) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        return cur.rowcount
+
+    def _where(self, job_id, source_url=None, filters=None, search=None):
+        clauses, params = ["job_id = ?"], [job_id]
+        if source_url:
+            clauses.append("source_url = ?")
+            params.append(source_url)
+        for field, value in (filters or {}).items():
+            clauses.append("json_extract(data, ?) = ?")
+            params.extend(['$."%s"' % field.replace('"', '\\"'), value])
+        if search:
+            # Match field values only (not keys or JSON escapes), with % and _ taken literally
+            clauses.append(
+                "EXISTS (SELECT 1 FROM json_each(results.data) AS j "
+                "WHERE j.atom IS NOT NULL AND CAST(j.atom AS TEXT) LIKE ? ESCAPE '\\')"
+            )
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        return " AND ".join(clauses), params
+
+    def count_results(self, job_id, source_url=None, filters=None, search=None):
+        where, params = self._where(job_id, source_url, filters, search)
+        return self._conn().execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+
+    def get_results(self, job_id, limit=100, offset=0, source_url=None, filters=None, search=None):
+        """One page of a job's records; `limit` is clamped to 1..MAX_PAGE_SIZE."""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        where, params = self._where(job_id, source_url, filters, search)
+        rows = self._conn().execute(
+            f"SELECT data FROM results WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [json.loads(r["data"]) for r in rows]
+
+    def iter_results(self, job_id, batch_size=500) -> Iterator[Dict]:
+        """Yield a job's records in insertion order without loading them all at once."""
+        last_id = 0
+        while True:
+            rows = self._conn().execute(
+                "SELECT id, data FROM results WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (job_id, last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield json.loads(r["data"])
+            last_id = rows[-1]["id"]
+
+    def result_fields(self, job_id):
+        """Distinct top-level keys across a job's records, ordered by the first record using them."""
+        rows = self._conn().execute(
+            "SELECT j.key FROM results AS r, json_each(r.data) AS j "
+            "WHERE r.job_id = ? GROUP BY j.key ORDER BY MIN(r.id)",
+            (job_id,),
+        )
+        return [r["key"] for r in rows]
+
+    # Schedules
+    def create_schedule(self, schedule_id, kind, config, interval_seconds=None, cron=None,
+                        key_fields=None, stop_after_unchanged=None, next_run=None):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO schedules (id, kind, config, interval_seconds, cron, key_fields, "
+                "stop_after_unchanged, next_run, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (schedule_id, kind, json.dumps(config, default=str), interval_seconds, cron,
+                 json.dumps(key_fields) if key_fields else None, stop_after_unchanged,
+                 next_run, time.time()),
+            )
+
+    def _schedule_row(self, row):
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "config": json.loads(row["config"]),
+            "interval_seconds": row["interval_seconds"],
+            "cron": row["cron"],
+            "key_fields": json.loads(row["key_fields"]) if row["key_fields"] else None,
+            "stop_after_unchanged": row["stop_after_unchanged"],
+            "enabled": bool(row["enabled"]),
+            "next_run": row["next_run"],
+            "last_job_id": row["last_job_id"],
+            "created_at": row["created_at"],
+        }
+
+    def get_schedule(self, schedule_id) -> Optional[Dict]:
+        row = self._conn().execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+        return self._schedule_row(row) if row else None
+
+    def list_schedules(self):
+        rows = self._conn().execute("SELECT * FROM schedules ORDER BY created_at")
+        return [self._schedule_row(r) for r in rows]
+
+    def due_schedules(self, now=None):
+        rows = self._conn().execute(
+            "SELECT * FROM schedules WHERE enabled = 1 AND next_run <= ? ORDER BY next_run",
+            (now or time.time(),),
+        )
+        return [self._schedule_row(r) for r in rows]
+
+    def update_schedule(self, schedule_id, **values):
+        """Set columns such as next_run, last_job_id or enabled on a schedule."""
+        allowed = {"next_run", "last_job_id", "enabled"}
+        cols = [k for k in values if k in allowed]
+        if not cols:
+            return
+        with self._conn() as conn:
+            conn.execute(
+                f"UPDATE schedules SET {', '.join(c + ' = ?' for c in cols)} WHERE id = ?",
+                [values[c] for c in cols] + [schedule_id],
+            )
+
+    def delete_schedule(self, schedule_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM fingerprints WHERE schedule_id = ?", (schedule_id,))
+            cur = conn.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+        return cur.rowcount > 0
+
+    # Fingerprints
+    def get_fingerprints(self, schedule_id, keys, chunk_size=500):
+        """Map record key -> fingerprint from the previous runs, for the given keys only."""
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i + chunk_size]
+            rows = self._conn().execute(
+                "SELECT record_key, fingerprint FROM fingerprints WHERE schedule_id = ? "
+                f"AND record_key IN ({', '.join('?' * len(chunk))})",
+                [schedule_id] + chunk,
+            )
+            found.update((r["record_key"], r["fingerprint"]) for r in rows)
+        return found
+
+    def apply_delta(self, schedule_id, job_id, delta, changed, unchanged_keys):
+        """
+        In one transaction: store a page's delta records as results of
+        `job_id`, upsert the (key, fingerprint, record) tuples in `changed`
+        and mark every key as seen by this job. A crash can therefore never
+        record a fingerprint whose change was not emitted.
+        """
+        rows = [
+            (schedule_id, key, fp, json.dumps(data, ensure_ascii=False), job_id)
+            for key, fp, data in changed
+        ]
+        with self._conn() as conn:
+            self._insert_results(conn, job_id, delta)
+            conn.executemany(
+                "INSERT INTO fingerprints (schedule_id, record_key, fingerprint, data, last_seen_job) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (schedule_id, record_key) DO UPDATE SET "
+                "fingerprint = excluded.fingerprint, data = excluded.data, "
+                "last_seen_job = excluded.last_seen_job",
+                rows,
+            )
+            conn.executemany(
+                "UPDATE fingerprints SET last_seen_job = ? WHERE schedule_id = ? AND record_key = ?",
+                [(job_id, schedule_id, k) for k in unchanged_keys],
+            )
+
+    def apply_removals(self, schedule_id, job_id):
+        """
+        Store every record a completed run did not see again as a `removed`
+        result of `job_id` and drop its fingerprint, in one transaction.
+        Returns the removed records.
+        """
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT data FROM fingerprints WHERE schedule_id = ? AND last_seen_job != ?",
+                (schedule_id, job_id),
+            ).fetchall()
+            removed = [dict(json.loads(r["data"]), _change="removed") for r in rows]
+            self._insert_results(conn, job_id, removed)
+            conn.execute(
+                "DELETE FROM fingerprints WHERE schedule_id = ? AND last_seen_job != ?",
+                (schedule_id, job_id),
+            )
+        return removed
+
+    def writer(self, job_id, batch_size=200, max_delay=2.0):
+        return BatchWriter(self, job_id, batch_size, max_delay)
+
+
+class BatchWriter:
+    """Buffers page results and writes them to the store in batched inserts."""
+
+    def __init__(self, store, job_id, batch_size=200, max_delay=2.0):
+        self.store = store
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def add(self, items):
+        self._pending.extend(items)
+        if (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.max_delay):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.store.add_results(self.job_id, self._pending)
+            self._pending = []
+        self._last_flush = time.monotonic()
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRAPER_DB", str(tmp_path / "api.db"))
+    import importlib
+    import api as api_module
+    return importlib.reload(api_module)
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize("interval", [-5, 0, "abc", 1.5, True])
+def test_create_schedule_rejects_bad_interval(client, interval):
+    res = client.post("/schedules", json={"url": "https://x.test", "interval_seconds": interval})
+    assert res.status_code == 400
+
+
+def test_create_schedule_accepts_interval(client, api):
+    res = client.post("/schedules", json={"url": "https://x.test", "interval_seconds": "3600",
+                                          "run_now": False})
+    assert res.status_code == 200
+    assert api.store.get_schedule(res.get_json()["schedule_id"])["interval_seconds"] == 3600
+
+
+def test_results_paging_is_bounded(client, api):
+    api.store.create_job("j", "scrape")
+    api.store.add_results("j", [{"n": i} for i in range(5)])
+    assert len(client.get("/results/j?limit=-1").get_json()["results"]) == 1
+    assert client.get("/results/j?limit=2&offset=4").get_json()["results"] == [{"n": 4}]
+    assert client.get("/results/j?limit=abc").status_code == 400
+    assert client.get("/results/j?offset=1.5").status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/crawl", "/schedules"])
+def test_crawl_rejects_bad_concurrency(client, path):
+    res = client.post(path, json={"kind": "crawl", "url": "https://x.test", "interval_seconds": 60,
+                                  "concurrency": 0})
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("run_now", [True, False])
+@pytest.mark.parametrize("cron", ["0 0 31 2 *", "0 0 * *", 5, ["0 * * * *"]])
+def test_create_schedule_rejects_bad_cron(client, api, cron, run_now):
+    res = client.post("/schedules", json={"url": "https://x.test", "cron": cron, "run_now": run_now})
+    assert res.status_code == 400
+    assert api.store.list_schedules() == []
+
+
+@pytest.mark.parametrize("extra", [
+    {"key_fields": "sku"},
+    {"key_fields": ["sku", 3]},
+    {"stop_after_unchanged_pages": "abc"},
+    {"stop_after_unchanged_pages": 0},
+    {"stop_after_unchanged_pages": 1.5},
+])
+def test_create_schedule_rejects_bad_delta_options(client, extra):
+    res = client.post("/schedules", json=dict({"url": "https://x.test", "interval_seconds": 60}, **extra))
+    assert res.status_code == 400
+
+
+def test_create_schedule_stores_delta_options(client, api):
+    res = client.post("/schedules", json={"url": "https://x.test", "interval_seconds": 60,
+                                          "key_fields": ["sku"], "stop_after_unchanged_pages": "2"})
+    schedule = api.store.get_schedule(res.get_json()["schedule_id"])
+    assert schedule["key_fields"] == ["sku"]
+    assert schedule["stop_after_unchanged"] == 2
@@ -0,0 +1,96 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import cli
+import crawler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse(*argv):
+    return cli.job_from_args(cli.build_parser().parse_args(list(argv)))
+
+
+def test_job_from_args_scrape():
+    job = parse("https://x.test/list", "-f", "title=h2.title", "-f", "price=.price span",
+                "--next-selector", "a.next", "--all", "--max-depth", "3", "--concurrency", "4",
+                "--delay", "0", "1", "--format", "csv", "--format", "json")
+    assert job == {
+        "mode": "scrape", "output": "scraped_data", "formats": ["csv", "json"],
+        "base_url": "https://x.test/list",
+        "fields": {"title": "h2.title", "price": ".price span"},
+        "next_selector": "a.next", "scrape_all": True, "delay_range": (0.0, 1.0),
+    }
+
+
+def test_job_from_args_crawl():
+    job = parse("https://x.test/", "--crawl", "--auto", "--next-selector", "a.next", "--all",
+                "--max-depth", "3", "--allow", "/shop/", "--concurrency", "4",
+                "--tor-port", "9050", "-o", "out")
+    assert job == {
+        "mode": "crawl", "output": "out", "formats": ["json"],
+        "start_urls": "https://x.test/",
+        "auto_mode": True, "max_depth": 3, "allow": ["/shop/"], "concurrency": 4,
+        "proxy_pool": {"proxies": None, "tor_ports": [9050], "strategy": "per_request"},
+    }
+
+
+@pytest.mark.parametrize("argv", [
+    ["https://x.test/", "-f", "title"],
+    ["https://x.test/", "-f", "=h1"],
+    ["https://x.test/", "--crawl", "--concurrency", "0"],
+    [],
+])
+def test_main_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.main(argv)
+    assert exc.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("content", [None, "{not json", "[1, 2]"])
+def test_main_bad_config(tmp_path, capsys, content):
+    path = tmp_path / "jobs.json"
+    if content is not None:
+        path.write_text(content)
+    assert cli.main(["--config", str(path)]) == 1
+    assert "Cannot load config" in capsys.readouterr().err
+
+
+def test_run_job_scrape_maps_url(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(cli, "scrape_site", lambda **kw: calls.append(kw) or [{"a": 1}])
+    results, saved = cli.run_job({"url": "https://x.test/", "delay_range": [0, 0],
+                                  "output": str(tmp_path / "out")})
+    assert calls == [{"base_url": "https://x.test/", "delay_range": (0, 0)}]
+    assert saved == [str(tmp_path / "out.json")]
+
+
+def test_run_job_crawl_config(monkeypatch, tmp_path):
+    pytest.importorskip("bs4")
+    pages = {
+        "https://shop.test/": '<a href="/item/1">1</a>',
+        "https://shop.test/item/1": "<h1>Widget</h1>",
+    }
+    monkeypatch.setattr(crawler, "fetch_html", lambda url, *a, **kw: pages[url])
+    config = tmp_path / "jobs.json"
+    config.write_text(json.dumps({
+        "mode": "crawl", "url": "https://shop.test/", "delay_range": [0, 0],
+        "routes": [{"pattern": "/item/", "fields": {"title": "h1"}}],
+        "output": str(tmp_path / "out"), "formats": ["json"],
+    }))
+    assert cli.main(["--config", str(config)]) == 0
+    saved = json.loads((tmp_path / "out.json").read_text())
+    assert saved == [{"title": "Widget", "source_url": "https://shop.test/item/1"}]
+
+
+def test_light_imports_skip_heavy_dependencies():
+    code = ("import sys, scraper, cli, crawler; "
+            "print([m for m in ('pandas', 'bs4', 'requests', 'selenium') if m in sys.modules])")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,95 @@
+import pytest
+
+import crawler
+from crawler import URLFrontier, canonicalize_url, is_allowed, match_route
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM:80/a/./b/../c?b=2&a=1#frag", "http://example.com/a/c?a=1&b=2"),
+    ("https://example.com:443", "https://example.com/"),
+    ("https://example.com:8443/x/", "https://example.com:8443/x/"),
+    ("https://example.com/p?utm_source=news&gclid=1&id=7", "https://example.com/p?id=7"),
+    ("https://example.com/p?ref=home", "https://example.com/p?ref=home"),
+    ("https://user:pw@example.com/x", "https://user:pw@example.com/x"),
+    ("https://[::1]:8080/x", "https://[::1]:8080/x"),
+    ("https://example.com/a//b", "https://example.com/a//b"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_url_extra_strip_params():
+    assert canonicalize_url("https://x.com/p?sid=9&id=1", strip_params=["sid"]) == "https://x.com/p?id=1"
+
+
+def test_frontier_dedups_on_canonical_form_but_returns_original():
+    frontier = URLFrontier()
+    assert frontier.add("https://Example.com/item?ref=a&utm_source=x")
+    assert not frontier.add("https://example.com/item?utm_medium=y&ref=a#top")
+    assert len(frontier) == 1
+    assert frontier.pop() == ("https://Example.com/item?ref=a&utm_source=x", 0)
+    assert frontier.seen("https://example.com/item?ref=a")
+
+
+def test_frontier_orders_by_priority_then_depth_then_insertion():
+    frontier = URLFrontier()
+    frontier.add("https://x.com/detail", depth=1, priority=10)
+    frontier.add("https://x.com/list-deep", depth=2, priority=0)
+    frontier.add("https://x.com/list-a", depth=1, priority=0)
+    frontier.add("https://x.com/list-b", depth=1, priority=0)
+    order = [frontier.pop()[0] for _ in range(len(frontier))]
+    assert order == ["https://x.com/list-a", "https://x.com/list-b",
+                     "https://x.com/list-deep", "https://x.com/detail"]
+
+
+def test_routes_and_allow_deny():
+    routes = [{"pattern": r"/product/"}, {"pattern": r"/category/"}]
+    assert match_route("https://x.com/category/1", routes) is routes[1]
+    assert match_route("https://x.com/about", routes) is None
+    assert is_allowed("https://x.com/a", allow=[r"/a"], deny=[r"/b"])
+    assert not is_allowed("https://x.com/a/b", allow=[r"/a"], deny=[r"/b"])
+    assert not is_allowed("https://x.com/c", allow=[r"/a"])
+
+
+def test_crawl_site_follows_links_and_routes(monkeypatch):
+    pytest.importorskip("bs4")
+    pages = {
+        "https://shop.test/": '<a href="/category/1">c</a><a href="https://other.test/">x</a>',
+        "https://shop.test/category/1": '<a href="/product/1?utm_source=z">p</a><a href="/product/1">p</a>',
+        "https://shop.test/product/1?utm_source=z": '<h1>Widget</h1>',
+    }
+    fetched = []
+
+    def fake_fetch(url, *args, **kwargs):
+        fetched.append(url)
+        return pages[url]
+
+    monkeypatch.setattr(crawler, "fetch_html", fake_fetch)
+    data = crawler.crawl_site(
+        "https://shop.test/",
+        routes=[{"pattern": r"/product/", "fields": {"title": "h1"}, "priority": 5}],
+        delay_range=(0, 0),
+    )
+    assert fetched == list(pages)
+    assert data == [{"title": "Widget", "source_url": "https://shop.test/product/1?utm_source=z"}]
+
+
+def test_crawl_site_reports_fetch_errors(monkeypatch):
+    pytest.importorskip("bs4")
+
+    def fake_fetch(url, *args, **kwargs):
+        if url.endswith("/broken"):
+            raise IOError("timeout")
+        return '<a href="/broken">b</a><a href="/ok">o</a>'
+
+    errors = []
+    monkeypatch.setattr(crawler, "fetch_html", fake_fetch)
+    crawler.crawl_site("https://shop.test/", max_depth=1, delay_range=(0, 0),
+                       error_callback=lambda url, e: errors.append(url))
+    assert errors == ["https://shop.test/broken"]
+
+
+@pytest.mark.parametrize("concurrency", [0, -1])
+def test_crawl_site_rejects_bad_concurrency(concurrency):
+    with pytest.raises(ValueError):
+        crawler.crawl_site("https://shop.test/", concurrency=concurrency, delay_range=(0, 0))
@@ -0,0 +1,266 @@
+import random
+import select
+import socket
+import socketserver
+import struct
+import threading
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from proxies import Proxy, ProxyPool, make_proxy_pool
+
+
+# Pool logic
+def test_with_credentials():
+    assert Proxy("socks5h://127.0.0.1:9050").with_credentials("t") == "socks5h://t:t@127.0.0.1:9050"
+    assert Proxy("socks5h://127.0.0.1").with_credentials("t") == "socks5h://t:t@127.0.0.1"
+    assert Proxy("socks5h://[::1]:9050").with_credentials("t") == "socks5h://t:t@[::1]:9050"
+    assert Proxy("socks5h://me:pw@host:1080").with_credentials("t") == "socks5h://me:pw@host:1080"
+
+
+def test_make_proxy_pool_spec():
+    pool = make_proxy_pool({"proxies": ["http://a:1"], "tor_ports": [9050, 9052]})
+    assert pool.strategy == "per_request"
+    assert [(p.url, p.isolate) for p in pool.proxies] == [
+        ("http://a:1", False),
+        ("socks5h://127.0.0.1:9050", True),
+        ("socks5h://127.0.0.1:9052", True),
+    ]
+    assert make_proxy_pool(None) is None
+    assert make_proxy_pool(pool) is pool
+
+
+def test_per_request_isolation_uses_fresh_credentials():
+    pool = ProxyPool.from_tor_ports([9050])
+    urls = {pool.acquire("http://example.onion/")[1] for _ in range(5)}
+    assert len(urls) == 5
+
+
+def test_weighting_prefers_fast_proxies():
+    random.seed(1)
+    pool = ProxyPool(["http://fast:1", "http://slow:1"])
+    fast, slow = pool.proxies
+    pool.report(fast, True, 0.1)
+    pool.report(slow, True, 1.0)
+    counts = Counter(pool.acquire("http://x.test/")[0].url for _ in range(2000))
+    assert counts["http://fast:1"] > 5 * counts["http://slow:1"] > 0
+
+
+def test_ewma_latency():
+    pool = ProxyPool(["http://a:1"], ewma_alpha=0.5)
+    proxy = pool.proxies[0]
+    pool.report(proxy, True, 1.0)
+    pool.report(proxy, True, 3.0)
+    assert proxy.latency == pytest.approx(2.0)
+
+
+def test_cooldown_after_consecutive_failures():
+    pool = ProxyPool(["http://bad:1", "http://good:1"], max_failures=2, cooldown=60)
+    bad, good = pool.proxies
+    pool.report(bad, False)
+    assert bad.healthy()
+    pool.report(bad, False)
+    assert not bad.healthy()
+    assert {pool.acquire("http://x.test/")[0] for _ in range(50)} == {good}
+    assert pool.stats()[0]["failures"] == 2
+
+
+def test_all_cooling_down_uses_first_to_recover():
+    pool = ProxyPool(["http://a:1", "http://b:1"], max_failures=1)
+    a, b = pool.proxies
+    pool.report(b, False)
+    pool.report(a, False)
+    assert pool.acquire("http://x.test/")[0] is b
+
+
+def test_per_host_spreads_over_several_proxies():
+    pool = ProxyPool.from_tor_ports([9050, 9052, 9054, 9056], strategy="per_host", host_spread=2)
+    used = {pool.acquire("http://example.onion/p%d" % i)[1] for i in range(40)}
+    assert len(used) == 2
+    assert all(u.startswith("socks5h://example.onion:example.onion@") for u in used)
+
+
+def test_per_host_replaces_slow_and_failed_proxies():
+    random.seed(2)
+    pool = ProxyPool(["http://a:1", "http://b:1", "http://c:1"], strategy="per_host",
+                     host_spread=1, max_failures=1)
+    first = pool.acquire("http://x.test/")[0]
+    assert {pool.acquire("http://x.test/")[0] for _ in range(10)} == {first}
+
+    # Far slower than the others: re-picked on the next acquire
+    pool.report(first, True, 30.0)
+    for p in pool.proxies:
+        if p is not first:
+            pool.report(p, True, 0.1)
+    second = pool.acquire("http://x.test/")[0]
+    assert second is not first
+
+    # Cooling down: reassigned as well
+    pool.report(second, False)
+    third = pool.acquire("http://x.test/")[0]
+    assert third not in (first, second)
+
+
+# Round trips through local stand-in proxies
+class TargetHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"hello {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPProxyHandler(BaseHTTPRequestHandler):
+    """Forward proxy: GET with an absolute URL is fetched and relayed."""
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with opener.open(self.path) as res:
+            body = res.read()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SOCKS5Handler(socketserver.BaseRequestHandler):
+    """Minimal SOCKS5 CONNECT proxy recording the usernames it sees."""
+    usernames = []
+
+    def recv_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def handle(self):
+        sock = self.request
+        _, nmethods = self.recv_exact(2)
+        methods = self.recv_exact(nmethods)
+        if 2 in methods:
+            sock.sendall(b"\x05\x02")
+            _, ulen = self.recv_exact(2)
+            username = self.recv_exact(ulen).decode()
+            plen = self.recv_exact(1)[0]
+            self.recv_exact(plen)
+            self.usernames.append(username)
+            sock.sendall(b"\x01\x00")
+        else:
+            sock.sendall(b"\x05\x00")
+            self.usernames.append(None)
+
+        _, _, _, atyp = self.recv_exact(4)
+        if atyp == 1:
+            host = socket.inet_ntoa(self.recv_exact(4))
+        else:
+            host = self.recv_exact(self.recv_exact(1)[0]).decode()
+        port = struct.unpack("!H", self.recv_exact(2))[0]
+        upstream = socket.create_connection((host, port))
+        sock.sendall(b"\x05\x00\x00\x01" + socket.inet_aton("0.0.0.0") + struct.pack("!H", 0))
+
+        with upstream:
+            while True:
+                readable, _, _ = select.select([sock, upstream], [], [], 5)
+                if not readable:
+                    return
+                for src in readable:
+                    data = src.recv(65536)
+                    if not data:
+                        return
+                    (upstream if src is sock else sock).sendall(data)
+
+
+class SOCKS5Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def target():
+    server = serve(ThreadingHTTPServer(("127.0.0.1", 0), TargetHandler))
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def no_env_proxies(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY",
+                 "http_proxy", "https_proxy", "all_proxy", "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_fetch_html_through_http_proxy_pool(target, no_env_proxies):
+    pytest.importorskip("requests")
+    from scraper import fetch_html
+
+    HTTPProxyHandler.requests_seen = []
+    proxy = serve(ThreadingHTTPServer(("127.0.0.1", 0), HTTPProxyHandler))
+    try:
+        pool = ProxyPool([f"http://127.0.0.1:{proxy.server_address[1]}"])
+        assert fetch_html(f"{target}/page", proxy_pool=pool) == "hello /page"
+        assert HTTPProxyHandler.requests_seen == [f"{target}/page"]
+        stats = pool.stats()[0]
+        assert stats["successes"] == 1 and stats["latency"] is not None
+    finally:
+        proxy.shutdown()
+
+
+def test_fetch_html_through_socks_pool_with_isolation(target, no_env_proxies):
+    pytest.importorskip("requests")
+    pytest.importorskip("socks")
+    from scraper import fetch_html
+
+    SOCKS5Handler.usernames = []
+    servers = [serve(SOCKS5Server(("127.0.0.1", 0), SOCKS5Handler)) for _ in range(2)]
+    try:
+        pool = ProxyPool.from_tor_ports([s.server_address[1] for s in servers])
+        for i in range(4):
+            assert fetch_html(f"{target}/p{i}", proxy_pool=pool) == f"hello /p{i}"
+        # per_request isolation: a distinct SOCKS username (Tor circuit) per request
+        assert len(set(SOCKS5Handler.usernames)) == 4
+        assert sum(s["successes"] for s in pool.stats()) == 4
+    finally:
+        for s in servers:
+            s.shutdown()
+
+
+def test_fetch_html_dead_proxy_is_reported_and_avoided(target, no_env_proxies):
+    pytest.importorskip("requests")
+    from scraper import fetch_html
+
+    dead = socket.socket()
+    dead.bind(("127.0.0.1", 0))
+    dead_port = dead.getsockname()[1]
+    dead.close()
+    proxy = serve(ThreadingHTTPServer(("127.0.0.1", 0), HTTPProxyHandler))
+    try:
+        pool = ProxyPool([f"http://127.0.0.1:{dead_port}", f"http://127.0.0.1:{proxy.server_address[1]}"],
+                         max_failures=1)
+        for _ in range(5):
+            assert fetch_html(f"{target}/x", proxy_pool=pool, retries=3, backoff=0) == "hello /x"
+        dead_stats, live_stats = pool.stats()
+        assert dead_stats["successes"] == 0
+        assert dead_stats["failures"] <= 1
+        assert live_stats["successes"] == 5
+    finally:
+        proxy.shutdown()
@@ -0,0 +1,127 @@
+from datetime import datetime
+
+import pytest
+
+import schedules
+from schedules import DeltaTracker, next_cron_time, next_run_time, parse_cron, run_schedule
+from store import ResultStore
+
+# Monday 2026-10-19 10:30 local time
+BASE = datetime(2026, 10, 19, 10, 30).timestamp()
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("0 6 * * *", datetime(2026, 10, 20, 6, 0)),
+    ("*/15 * * * *", datetime(2026, 10, 19, 10, 45)),
+    ("0 0 1 * *", datetime(2026, 11, 1, 0, 0)),
+    ("30 9 * * 1-5", datetime(2026, 10, 20, 9, 30)),
+    ("0 0 * * 7", datetime(2026, 10, 25, 0, 0)),
+    # Both day fields restricted: either may match (Friday 23rd comes first)
+    ("0 12 13 * 5", datetime(2026, 10, 23, 12, 0)),
+    # "*/2" counts as unrestricted, so both fields must match: next odd-day Monday
+    ("0 0 */2 * 1", datetime(2026, 11, 9, 0, 0)),
+])
+def test_next_cron_time(expr, expected):
+    assert datetime.fromtimestamp(next_cron_time(expr, BASE)) == expected
+
+
+def test_parse_cron_fields():
+    (minutes, hours, days, months, weekdays), dom_set, dow_set = parse_cron("5/20 1,3 */10 * 6-7")
+    assert minutes == {5, 25, 45}
+    assert hours == {1, 3}
+    assert days == {1, 11, 21, 31}
+    assert weekdays == {6, 0}
+    assert (dom_set, dow_set) == (False, True)
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* * 0 * *", "a * * * *", "5-1 * * * *"])
+def test_parse_cron_rejects_invalid(expr):
+    with pytest.raises(ValueError):
+        parse_cron(expr)
+
+
+def test_next_run_time_interval():
+    assert next_run_time({"interval_seconds": 60}, 1000.0) == 1060.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "jobs.db"))
+
+
+def changes(store, job_id):
+    return sorted((r.get("link"), r["_change"]) for r in store.iter_results(job_id))
+
+
+def test_delta_tracker_added_changed_removed(store):
+    for job in ("j1", "j2", "j3"):
+        store.create_job(job, "scheduled-scrape")
+    first = DeltaTracker(store, "s", "j1")
+    first.diff_page([{"link": "a", "price": "1"}, {"link": "b", "price": "2"}])
+    first.removed()
+    assert changes(store, "j1") == [("a", "added"), ("b", "added")]
+
+    second = DeltaTracker(store, "s", "j2")
+    assert second.diff_page([{"link": "a", "price": "1", "source_url": "p2"}]) == []
+    second.removed()
+    assert changes(store, "j2") == [("b", "removed")]
+
+    third = DeltaTracker(store, "s", "j3")
+    third.diff_page([{"link": "a", "price": "9"}, {"link": "b", "price": "2"}])
+    assert changes(store, "j3") == [("a", "changed"), ("b", "added")]
+
+
+def fake_runner(pages, fail_on=None, error_pages=()):
+    def run(progress_callback=None, page_callback=None, collect_results=True,
+            error_callback=None, **config):
+        for i, items in enumerate(pages):
+            if i == fail_on:
+                raise RuntimeError("boom")
+            if i in error_pages:
+                error_callback(f"p{i}", RuntimeError("timeout"))
+                continue
+            if page_callback(f"p{i}", [dict(x) for x in items]) is False:
+                break
+    return run
+
+
+def run(store, monkeypatch, job_id, runner, kind="scrape", **schedule):
+    monkeypatch.setitem(schedules.RUNNERS, kind, runner)
+    store.create_job(job_id, "scheduled-" + kind)
+    return run_schedule(store, dict({"id": "s", "kind": kind, "config": {}}, **schedule), job_id)
+
+
+def test_crash_keeps_emitted_deltas(store, monkeypatch):
+    run(store, monkeypatch, "j1", fake_runner([[{"link": "a", "price": "1"}, {"link": "b", "price": "2"}]]))
+    with pytest.raises(RuntimeError):
+        run(store, monkeypatch, "j2", fake_runner([[{"link": "b", "price": "3"}], []], fail_on=1))
+    assert changes(store, "j2") == [("b", "changed")]
+    run(store, monkeypatch, "j3", fake_runner([[{"link": "a", "price": "1"}, {"link": "b", "price": "3"}]]))
+    assert changes(store, "j3") == []
+
+
+def test_fetch_errors_skip_removals(store, monkeypatch):
+    pages = [[{"link": "a", "price": "1"}], [{"link": "b", "price": "2"}]]
+    assert run(store, monkeypatch, "j1", fake_runner(pages), kind="crawl")
+    assert not run(store, monkeypatch, "j2", fake_runner(pages, error_pages={1}), kind="crawl")
+    assert changes(store, "j2") == []
+    assert run(store, monkeypatch, "j3", fake_runner(pages), kind="crawl")
+    assert changes(store, "j3") == []
+
+
+def test_stop_after_unchanged_pages(store, monkeypatch):
+    pages = [[{"link": "a"}], [{"link": "b"}], [{"link": "c"}]]
+    run(store, monkeypatch, "j1", fake_runner(pages[:2]))
+    assert not run(store, monkeypatch, "j2", fake_runner(pages), stop_after_unchanged=1)
+    # Stopped after page 0, so page 2's new record is not seen and nothing is removed
+    assert changes(store, "j2") == []
+
+
+def test_scheduler_survives_schedule_that_never_fires(store):
+    store.create_schedule("bad", "scrape", {}, cron="0 0 31 2 *", next_run=0)
+    store.create_schedule("good", "scrape", {}, interval_seconds=60, next_run=0)
+    launched = []
+    schedules.Scheduler(store, lambda s: launched.append(s["id"])).run_due(BASE)
+    assert launched == ["good"]
+    assert not store.get_schedule("bad")["enabled"]
+    assert store.get_schedule("good")["next_run"] == BASE + 60
@@ -0,0 +1,64 @@
+import pytest
+
+from store import MAX_PAGE_SIZE, ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultStore(str(tmp_path / "jobs.db"))
+    s.create_job("j", "scrape", {"url": "https://x.test"}, total=3)
+    return s
+
+
+def test_job_lifecycle(store):
+    store.update_progress("j", 2, 3)
+    store.finish_job("j", "completed")
+    job = store.get_job("j")
+    assert job["status"] == "completed"
+    assert job["progress"] == {"page": 2, "total": 3}
+    assert store.get_job("missing") is None
+
+
+def test_mark_interrupted(store):
+    store.mark_interrupted()
+    assert store.get_job("j")["status"] == "failed"
+
+
+def test_batch_writer_dedups_and_flushes(store):
+    writer = store.writer("j", batch_size=2, max_delay=60)
+    writer.add([{"title": " A ", "source_url": "u1"}])
+    assert store.count_results("j") == 0
+    writer.add([{"title": "A", "source_url": "u1"}, {"title": "B", "source_url": "u2"}])
+    writer.flush()
+    assert store.get_results("j") == [{"title": "A", "source_url": "u1"},
+                                      {"title": "B", "source_url": "u2"}]
+    assert list(store.iter_results("j", batch_size=1)) == store.get_results("j")
+
+
+def test_filters_and_paging(store):
+    store.add_results("j", [{"title": f"t{i}", "price": str(i % 3), "source_url": f"u{i % 2}"}
+                            for i in range(10)])
+    assert store.count_results("j", source_url="u1") == 5
+    assert store.count_results("j", filters={"price": "2"}) == 3
+    assert [r["title"] for r in store.get_results("j", limit=3, offset=2)] == ["t2", "t3", "t4"]
+
+
+def test_get_results_clamps_limit(store):
+    store.add_results("j", [{"n": i} for i in range(MAX_PAGE_SIZE + 5)])
+    assert len(store.get_results("j", limit=-1)) == 1
+    assert len(store.get_results("j", limit=10 ** 6)) == MAX_PAGE_SIZE
+    assert store.get_results("j", limit=1, offset=-5) == [{"n": 0}]
+
+
+def test_search_matches_values_only(store):
+    store.add_results("j", [
+        {"title": "Red shoe", "price": "10%"},
+        {"title": "Blue_hat", "price": "5"},
+        {"title": "Green", "note": 'say "hi"'},
+    ])
+    assert store.count_results("j", search="title") == 0
+    assert store.count_results("j", search="shoe") == 1
+    assert store.count_results("j", search="%") == 1
+    assert store.count_results("j", search="_") == 1
+    assert store.count_results("j", search="\\") == 0
+    assert store.count_results("j", search='"hi"') == 1